@@ -4,10 +4,39 @@ Clockify API Client
 A Python client for interacting with the Clockify REST API.
 """
 
+import hashlib
 import os
+import time
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from timestamps import format_timestamp
+
+
+def _json(response: requests.Response):
+    """Decode a JSON response body with orjson."""
+    return orjson.loads(response.content)
+
+
+class RateLimitRetry(Retry):
+    """
+    Retry policy that also retries POSTs, but only when rate limited.
+    
+    A 429 means the request was rejected before being processed, so it is
+    safe to resend. A 5xx on a POST may have created the entry anyway, so
+    those are left to the caller rather than risking duplicates.
+    """
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method.upper() == "POST":
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
 
 
 class ClockifyClient:
@@ -15,21 +44,56 @@ class ClockifyClient:
     
     BASE_URL = "https://api.clockify.me/api/v1"
     
-    def __init__(self, api_key: str, workspace_id: str):
+    # Keep-alive connections kept open per host; sized above the
+    # scheduler's concurrency so bursts of requests reuse sockets
+    POOL_SIZE = 32
+    
+    # Transient failures are retried with exponential backoff and jitter,
+    # honouring Retry-After on 429 responses
+    RETRY = RateLimitRetry(
+        total=5,
+        backoff_factor=1.0,
+        backoff_jitter=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    
+    # Max page size allowed by the time entries endpoint
+    PAGE_SIZE = 500
+    
+    # Seconds that cached user/project lookups stay valid on disk
+    CACHE_TTL = 3600
+    # An empty XDG_CACHE_HOME is treated as unset, per the XDG spec
+    CACHE_DIR = Path(
+        os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    ) / "clockify_utils"
+    
+    def __init__(self, api_key: str, workspace_id: str, use_cache: bool = True):
         """
         Initialize the Clockify client.
         
         Args:
             api_key: Clockify API key
             workspace_id: Workspace ID to operate on
+            use_cache: Whether to cache user and project lookups on disk
         """
         self.api_key = api_key
         self.workspace_id = workspace_id
+        self.use_cache = use_cache
+        # Namespace cache files per API key so users never share entries
+        self._cache_prefix = hashlib.sha256(api_key.encode()).hexdigest()[:16]
         self.session = requests.Session()
         self.session.headers.update({
             "X-Api-Key": api_key,
             "Content-Type": "application/json"
         })
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_SIZE,
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=self.RETRY
+        )
+        self.session.mount("https://", adapter)
         self._user_id: Optional[str] = None
     
     @property
@@ -39,11 +103,66 @@ class ClockifyClient:
             self._user_id = self.get_user()["id"]
         return self._user_id
     
+    def _cache_path(self, key: str) -> Path:
+        """Get the on-disk location of a cache entry."""
+        return self.CACHE_DIR / f"{self._cache_prefix}-{key}.json"
+    
+    def _cache_get(self, key: str, ttl: Optional[int] = None):
+        """
+        Read a cached value if caching is enabled and it has not expired.
+        
+        Args:
+            key: Cache entry name
+            ttl: Maximum age in seconds (default: CACHE_TTL)
+            
+        Returns:
+            The cached value, or None on a miss
+        """
+        if not self.use_cache:
+            return None
+        
+        path = self._cache_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > (self.CACHE_TTL if ttl is None else ttl):
+                return None
+            return orjson.loads(path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+    
+    def _cache_put(self, key: str, value) -> None:
+        """
+        Store a value in the cache, ignoring filesystem errors.
+        
+        Cached payloads include user details, so the directory and files
+        are only readable by the current user.
+        """
+        if not self.use_cache:
+            return
+        
+        path = self._cache_path(key)
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            # Start from a fresh file so the 0600 mode below always applies
+            tmp_path.unlink(missing_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(value))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
     def get_user(self) -> dict:
         """Get current user info."""
+        user = self._cache_get("user")
+        if user is not None:
+            return user
+        
         response = self.session.get(f"{self.BASE_URL}/user")
         response.raise_for_status()
-        return response.json()
+        user = _json(response)
+        self._cache_put("user", user)
+        return user
     
     def get_projects(self, archived: bool = False) -> list[dict]:
         """
@@ -55,50 +174,88 @@ class ClockifyClient:
         Returns:
             List of project dictionaries
         """
+        cache_key = f"projects-{self.workspace_id}-{str(archived).lower()}"
+        projects = self._cache_get(cache_key)
+        if projects is not None:
+            return projects
+        
         params = {"archived": str(archived).lower()}
         response = self.session.get(
             f"{self.BASE_URL}/workspaces/{self.workspace_id}/projects",
             params=params
         )
         response.raise_for_status()
-        return response.json()
+        projects = _json(response)
+        self._cache_put(cache_key, projects)
+        return projects
     
-    def get_time_entries(
+    def iter_time_entries(
         self,
         start: datetime,
         end: datetime,
         project_id: Optional[str] = None
-    ) -> list[dict]:
+    ) -> Iterator[dict]:
         """
-        Get time entries for the current user within a date range.
+        Iterate over time entries for the current user within a date range.
+        
+        Entries are fetched one page at a time, so only a single page is
+        held in memory while the caller consumes them.
         
         Args:
             start: Start datetime
             end: End datetime
             project_id: Optional project ID to filter by
             
-        Returns:
-            List of time entry dictionaries
+        Yields:
+            Time entry dictionaries
         """
         params = {
-            "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "page-size": 500  # Max allowed
+            "start": format_timestamp(start),
+            "end": format_timestamp(end),
+            "page-size": self.PAGE_SIZE
         }
         if project_id:
             params["project"] = project_id
+        
+        page = 1
+        while True:
+            params["page"] = page
+            response = self.session.get(
+                f"{self.BASE_URL}/workspaces/{self.workspace_id}/user/{self.user_id}/time-entries",
+                params=params
+            )
+            response.raise_for_status()
+            entries = _json(response)
+            yield from entries
             
-        response = self.session.get(
-            f"{self.BASE_URL}/workspaces/{self.workspace_id}/user/{self.user_id}/time-entries",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+            # A short page means there is nothing left to fetch
+            if len(entries) < self.PAGE_SIZE:
+                break
+            page += 1
     
-    def create_time_entry(
+    def get_time_entries(
         self,
         start: datetime,
         end: datetime,
+        project_id: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Get time entries for the current user within a date range.
+        
+        Args:
+            start: Start datetime
+            end: End datetime
+            project_id: Optional project ID to filter by
+            
+        Returns:
+            List of time entry dictionaries
+        """
+        return list(self.iter_time_entries(start, end, project_id))
+    
+    def create_time_entry(
+        self,
+        start: Union[datetime, str],
+        end: Union[datetime, str],
         project_id: str,
         description: str,
         billable: bool = True
@@ -107,8 +264,8 @@ class ClockifyClient:
         Create a new time entry.
         
         Args:
-            start: Start datetime
-            end: End datetime
+            start: Start datetime, or a string from format_timestamp()
+            end: End datetime, or a string from format_timestamp()
             project_id: Project ID
             description: Entry description
             billable: Whether the entry is billable
@@ -117,8 +274,8 @@ class ClockifyClient:
             Created time entry dictionary
         """
         payload = {
-            "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "start": format_timestamp(start),
+            "end": format_timestamp(end),
             "projectId": project_id,
             "description": description,
             "billable": billable,
@@ -127,40 +284,7 @@ class ClockifyClient:
         
         response = self.session.post(
             f"{self.BASE_URL}/workspaces/{self.workspace_id}/time-entries",
-            json=payload
+            data=orjson.dumps(payload)
         )
         response.raise_for_status()
-        return response.json()
-    
-    def get_existing_entries_by_project_and_date(
-        self,
-        start_date: datetime,
-        end_date: datetime
-    ) -> dict[str, set[str]]:
-        """
-        Get a mapping of project IDs to dates that already have entries.
-        
-        Args:
-            start_date: Start of date range
-            end_date: End of date range
-            
-        Returns:
-            Dictionary mapping project_id -> set of date strings (YYYY-MM-DD)
-        """
-        entries = self.get_time_entries(start_date, end_date)
-        existing: dict[str, set[str]] = {}
-        
-        for entry in entries:
-            project_id = entry.get("projectId")
-            if not project_id:
-                continue
-            
-            # Extract date from start time
-            start_str = entry.get("timeInterval", {}).get("start", "")
-            if start_str:
-                date_str = start_str[:10]  # YYYY-MM-DD
-                if project_id not in existing:
-                    existing[project_id] = set()
-                existing[project_id].add(date_str)
-        
-        return existing
+        return _json(response)
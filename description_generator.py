@@ -5,6 +5,7 @@ Generates realistic description variations for time entries based on templates.
 """
 
 import random
+from collections import deque
 from typing import Optional
 
 
@@ -21,19 +22,40 @@ class DescriptionGenerator:
         "weekly", "daily", "end of week", "mid-week", "ongoing"
     ]
     
-    def __init__(self, templates: Optional[list[str]] = None):
+    # Number of recently used templates to avoid repeating
+    RECENT_LIMIT = 3
+    
+    def __init__(
+        self,
+        templates: Optional[list[str]] = None,
+        seed: Optional[int] = None
+    ):
         """
         Initialize the description generator.
         
         Args:
             templates: List of description template strings
+            seed: Optional seed for reproducible descriptions
         """
         self.templates = templates or []
-        self._used_recently: list[str] = []
+        self._rng = random.Random(seed)
+        self._used_recently: deque[str] = deque(maxlen=self.RECENT_LIMIT)
+        self._recent_set: set[str] = set()
+        # Template -> (split activities, normalized description)
+        self._tokens: dict[str, tuple[list[str], str]] = {}
+        self._tokenize(self.templates)
     
     def add_templates(self, templates: list[str]) -> None:
         """Add more templates to the pool."""
         self.templates.extend(templates)
+        self._tokenize(templates)
+    
+    def _tokenize(self, templates: list[str]) -> None:
+        """Split templates into activities once, rather than on every generate."""
+        for template in templates:
+            if template not in self._tokens:
+                activities = [a.strip() for a in template.split(",")]
+                self._tokens[template] = (activities, ", ".join(activities))
     
     def generate(self) -> str:
         """
@@ -46,17 +68,19 @@ class DescriptionGenerator:
             return "general work and updates"
         
         # Avoid repeating the same description consecutively
-        available = [t for t in self.templates if t not in self._used_recently]
+        available = [t for t in self.templates if t not in self._recent_set]
         if not available:
             available = self.templates
             self._used_recently.clear()
+            self._recent_set.clear()
         
-        chosen = random.choice(available)
-        self._used_recently.append(chosen)
+        chosen = self._rng.choice(available)
         
-        # Keep only last 3 used
-        if len(self._used_recently) > 3:
-            self._used_recently.pop(0)
+        # Keep only the last RECENT_LIMIT used; the deque drops the oldest
+        if len(self._used_recently) == self._used_recently.maxlen:
+            self._recent_set.discard(self._used_recently[0])
+        self._used_recently.append(chosen)
+        self._recent_set.add(chosen)
         
         return self._create_variation(chosen)
     
@@ -70,41 +94,65 @@ class DescriptionGenerator:
         Returns:
             Varied description
         """
-        # Split into activities
-        activities = [a.strip() for a in template.split(",")]
+        if template not in self._tokens:
+            # Templates appended to self.templates directly skip add_templates
+            self._tokenize([template])
+        tokens, joined = self._tokens[template]
+        activities = tokens
+        count = len(activities)
+        rng = self._rng
         
-        # Occasionally shuffle order
-        if len(activities) > 1 and random.random() < 0.3:
-            random.shuffle(activities)
+        # Occasionally shuffle order (on a copy, the tokens are reused)
+        if count > 1 and rng.random() < 0.3:
+            activities = activities.copy()
+            rng.shuffle(activities)
         
         # Occasionally drop one activity if there are many
-        if len(activities) > 2 and random.random() < 0.2:
-            activities = random.sample(activities, len(activities) - 1)
+        if count > 2 and rng.random() < 0.2:
+            activities = rng.sample(activities, count - 1)
         
+        # Unchanged activities reuse the precomputed description
+        if activities is tokens:
+            return joined
         return ", ".join(activities)
     
-    @classmethod
-    def from_history(cls, entries: list[dict], project_id: str) -> "DescriptionGenerator":
+    @staticmethod
+    def templates_by_project(entries: list[dict]) -> dict[str, list[str]]:
         """
-        Create a generator from historical entries for a specific project.
+        Extract unique descriptions from historical entries, grouped by project.
         
         Args:
             entries: List of time entry dictionaries
-            project_id: Project ID to filter by
             
         Returns:
-            DescriptionGenerator instance with extracted templates
+            Dictionary mapping project_id -> list of unique descriptions
         """
-        templates = []
-        seen = set()
+        templates: dict[str, list[str]] = {}
+        seen: dict[str, set[str]] = {}
         
         for entry in entries:
-            if entry.get("projectId") != project_id:
+            project_id = entry.get("projectId")
+            if not project_id:
                 continue
             
-            desc = entry.get("description", "").strip()
-            if desc and desc not in seen:
-                templates.append(desc)
-                seen.add(desc)
+            desc = (entry.get("description") or "").strip()
+            project_seen = seen.setdefault(project_id, set())
+            if desc and desc not in project_seen:
+                templates.setdefault(project_id, []).append(desc)
+                project_seen.add(desc)
+        
+        return templates
+    
+    @classmethod
+    def from_history(cls, entries: list[dict], project_id: str) -> "DescriptionGenerator":
+        """
+        Create a generator from historical entries for a specific project.
         
-        return cls(templates=templates)
+        Args:
+            entries: List of time entry dictionaries
+            project_id: Project ID to filter by
+            
+        Returns:
+            DescriptionGenerator instance with extracted templates
+        """
+        return cls(templates=cls.templates_by_project(entries).get(project_id, []))
@@ -6,6 +6,7 @@ Helper script to list all projects and their IDs in your Clockify workspace.
 Use this to populate your config.yaml file.
 """
 
+import argparse
 import os
 import sys
 
@@ -15,6 +16,17 @@ from clockify_client import ClockifyClient
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="List the projects and their IDs in your Clockify workspace"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached project lists and always query the API"
+    )
+    
+    args = parser.parse_args()
+    
     load_dotenv()
     
     api_key = os.environ.get("CLOCKIFY_API_KEY")
@@ -50,7 +62,11 @@ def main():
             print("Set CLOCKIFY_WORKSPACE_ID to one of the above IDs")
             sys.exit(0)
     
-    client = ClockifyClient(api_key=api_key, workspace_id=workspace_id)
+    client = ClockifyClient(
+        api_key=api_key,
+        workspace_id=workspace_id,
+        use_cache=not args.no_cache
+    )
     
     print("🔍 Fetching projects...\n")
     projects = client.get_projects()
@@ -0,0 +1,22 @@
+"""
+Timestamp Helpers
+
+Formatting of datetimes for the Clockify REST API, kept free of
+third-party imports so it is cheap to load.
+"""
+
+from datetime import datetime
+from typing import Union
+
+
+def format_timestamp(value: Union[datetime, str]) -> str:
+    """
+    Format a datetime as the ISO-8601 UTC string expected by the API.
+    
+    Strings are assumed to be already formatted and are returned unchanged.
+    Any tzinfo is dropped without conversion, so aware datetimes format the
+    same way strftime("%Y-%m-%dT%H:%M:%SZ") would.
+    """
+    if isinstance(value, str):
+        return value
+    return value.replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
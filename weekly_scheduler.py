@@ -7,40 +7,154 @@ Main script to automate creating weekly time entries in Clockify.
 
 import argparse
 import os
+import re
 import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Iterable
 
-import yaml
-from dotenv import load_dotenv
+from timestamps import format_timestamp
 
-from clockify_client import ClockifyClient
-from description_generator import DescriptionGenerator
+# Third-party and API client imports are deferred to where they are used,
+# so --help and argument errors don't pay for loading requests and yaml
+
+# Maximum number of time entries created concurrently
+MAX_CONCURRENT_REQUESTS = 8
+
+# Matches ${VAR} references to environment variables in config values
+ENV_VAR_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+
+def expand_env_vars(value):
+    """Recursively replace ${VAR} references in strings with environment values."""
+    if isinstance(value, str):
+        return ENV_VAR_PATTERN.sub(lambda m: os.environ.get(m.group(1), ""), value)
+    if isinstance(value, dict):
+        return {key: expand_env_vars(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [expand_env_vars(item) for item in value]
+    return value
 
 
 def load_config(config_path: str) -> dict:
     """Load configuration from YAML file."""
+    import yaml
+    
+    # Use the libyaml C parser when PyYAML was built with it
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+    
     with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=SafeLoader)
     
     # Resolve environment variables in config
-    if config.get("api_key", "").startswith("${"):
-        env_var = config["api_key"][2:-1]  # Extract VAR from ${VAR}
-        config["api_key"] = os.environ.get(env_var, "")
+    return expand_env_vars(config or {})
+
+
+def validate_config(config) -> dict:
+    """
+    Validate the configuration and fill in defaults for optional settings.
+    
+    Args:
+        config: Configuration as returned by load_config (any YAML value)
+        
+    Returns:
+        The same configuration, with defaults applied
+        
+    Raises:
+        ValueError: If a required setting is missing or has the wrong type
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Config file must contain a mapping of settings")
+    
+    if not config.get("api_key"):
+        raise ValueError(
+            "API key not found. Set CLOCKIFY_API_KEY environment variable\n"
+            "   or add api_key to your config file"
+        )
+    
+    if not config.get("workspace_id"):
+        raise ValueError("Workspace ID not found in config file")
+    
+    config.setdefault("day_start_hour", 9)
+    start_hour = config["day_start_hour"]
+    if isinstance(start_hour, bool) or not isinstance(start_hour, int) or not 0 <= start_hour <= 23:
+        raise ValueError("day_start_hour must be a whole hour between 0 and 23")
+    
+    schedule = config.get("schedule") or []
+    if not isinstance(schedule, list):
+        raise ValueError("schedule must be a list of projects")
+    config["schedule"] = schedule
+    
+    for position, project in enumerate(schedule, start=1):
+        if not isinstance(project, dict) or not project.get("project_id"):
+            raise ValueError(f"Schedule entry {position} is missing project_id")
+        if not isinstance(project["project_id"], str):
+            raise ValueError(f"Schedule entry {position}: project_id must be a string")
+        
+        project.setdefault("name", "Unknown")
+        project.setdefault("daily_minutes", 60)
+        project["description_templates"] = project.get("description_templates") or []
+        
+        daily_minutes = project["daily_minutes"]
+        if isinstance(daily_minutes, bool) or not isinstance(daily_minutes, int) or daily_minutes <= 0:
+            raise ValueError(f"{project['name']}: daily_minutes must be a positive integer")
+        
+        templates = project["description_templates"]
+        if not isinstance(templates, list) or not all(isinstance(t, str) for t in templates):
+            raise ValueError(f"{project['name']}: description_templates must be a list of strings")
     
     return config
 
 
 def get_week_dates(start_date: datetime, end_date: datetime) -> list[datetime]:
     """Get business days (Mon-Fri) within the date range."""
-    dates = []
-    current = start_date
-    while current <= end_date:
-        # Only include weekdays (0=Monday, 4=Friday)
-        if current.weekday() < 5:
-            dates.append(current)
-        current += timedelta(days=1)
-    return dates
+    first_weekday = start_date.weekday()
+    num_days = (end_date - start_date).days + 1
+    # Only include weekdays (0=Monday, 4=Friday)
+    return [
+        start_date + timedelta(days=offset)
+        for offset in range(num_days)
+        if (first_weekday + offset) % 7 < 5
+    ]
+
+
+def index_by_project_date(
+    entries: Iterable[dict],
+    start_date: datetime,
+    end_date: datetime
+) -> dict[str, set[str]]:
+    """
+    Get a mapping of project IDs to dates that already have entries.
+    
+    Args:
+        entries: Iterable of time entry dictionaries
+        start_date: Start of date range
+        end_date: End of date range
+        
+    Returns:
+        Dictionary mapping project_id -> set of date strings (YYYY-MM-DD)
+    """
+    first_day = start_date.strftime("%Y-%m-%d")
+    last_day = end_date.strftime("%Y-%m-%d")
+    existing: dict[str, set[str]] = defaultdict(set)
+    
+    for entry in entries:
+        try:
+            project_id = entry["projectId"]
+            # Extract date from start time
+            date_str = entry["timeInterval"]["start"][:10]  # YYYY-MM-DD
+        except (KeyError, TypeError):
+            continue
+        
+        if project_id and first_day <= date_str <= last_day:
+            existing[project_id].add(date_str)
+    
+    return existing
 
 
 def calculate_time_slots(
@@ -57,7 +171,8 @@ def calculate_time_slots(
         start_hour: Hour to start the workday (24h format)
         
     Returns:
-        List of dicts with start, end, project_id, and description
+        List of dicts with start, end (plus their API-formatted start_iso and
+        end_iso), project_id, project_name, and templates
     """
     slots = []
     current_time = date.replace(hour=start_hour, minute=0, second=0, microsecond=0)
@@ -69,6 +184,8 @@ def calculate_time_slots(
         slots.append({
             "start": current_time,
             "end": end_time,
+            "start_iso": format_timestamp(current_time),
+            "end_iso": format_timestamp(end_time),
             "project_id": project["project_id"],
             "project_name": project.get("name", "Unknown"),
             "templates": project.get("description_templates", [])
@@ -108,9 +225,19 @@ def main():
         action="store_true",
         help="Analyze past entries to enhance descriptions"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached user/project lookups and always query the API"
+    )
     
     args = parser.parse_args()
     
+    from dotenv import load_dotenv
+    
+    from clockify_client import ClockifyClient
+    from description_generator import DescriptionGenerator
+    
     # Load environment variables from .env if present
     load_dotenv()
     
@@ -121,16 +248,10 @@ def main():
         print("   Run with --help for usage information")
         sys.exit(1)
     
-    config = load_config(str(config_path))
-    
-    # Validate required config
-    if not config.get("api_key"):
-        print("❌ API key not found. Set CLOCKIFY_API_KEY environment variable")
-        print("   or add api_key to your config file")
-        sys.exit(1)
-    
-    if not config.get("workspace_id"):
-        print("❌ Workspace ID not found in config file")
+    try:
+        config = validate_config(load_config(str(config_path)))
+    except ValueError as e:
+        print(f"❌ {e}")
         sys.exit(1)
     
     # Calculate date range
@@ -154,74 +275,99 @@ def main():
     # Initialize client
     client = ClockifyClient(
         api_key=config["api_key"],
-        workspace_id=config["workspace_id"]
+        workspace_id=config["workspace_id"],
+        use_cache=not args.no_cache
     )
     
-    # Get existing entries for duplicate detection
+    # Fetch the requested range (plus history, if analyzing) in a single call
+    range_start = start_date.replace(hour=0, minute=0, second=0)
+    range_end = end_date.replace(hour=23, minute=59, second=59)
+    fetch_start = range_start
     print("🔍 Checking for existing entries...")
-    existing = client.get_existing_entries_by_project_and_date(
-        start_date.replace(hour=0, minute=0, second=0),
-        end_date.replace(hour=23, minute=59, second=59)
-    )
-    
-    # Optionally analyze history for better descriptions
-    history_entries = []
     if args.analyze_history:
         print("📊 Analyzing entry history for description patterns...")
-        history_start = start_date - timedelta(days=60)
-        history_entries = client.get_time_entries(history_start, start_date)
+        fetch_start = range_start - timedelta(days=60)
+    
+    # History has to be kept in memory; otherwise stream pages into the index
+    if args.analyze_history:
+        entries = client.get_time_entries(fetch_start, range_end)
+    else:
+        entries = client.iter_time_entries(fetch_start, range_end)
+    existing = index_by_project_date(entries, range_start, range_end)
+    history_entries = entries if args.analyze_history else []
     
     # Get the schedule from config
-    schedule = config.get("schedule", [])
-    start_hour = config.get("day_start_hour", 9)
+    schedule = config["schedule"]
+    start_hour = config["day_start_hour"]
+    
+    # One generator per schedule entry, so recent-repeat avoidance spans all
+    # days; keyed by position since a project may be scheduled more than once
+    history_templates = DescriptionGenerator.templates_by_project(history_entries)
+    generators = [
+        DescriptionGenerator(
+            templates=history_templates.get(project["project_id"], [])
+            + project["description_templates"]
+        )
+        for project in schedule
+    ]
     
     # Process each day
     dates = get_week_dates(start_date, end_date)
     entries_created = 0
     entries_skipped = 0
+    project_ids = {project["project_id"] for project in schedule}
     
-    for date in dates:
-        date_str = date.strftime("%Y-%m-%d")
-        day_name = date.strftime("%A")
-        print(f"\n📆 {day_name}, {date_str}")
-        print("-" * 40)
-        
-        slots = calculate_time_slots(date, schedule, start_hour)
-        
-        for slot in slots:
-            project_id = slot["project_id"]
-            project_name = slot["project_name"]
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        for date in dates:
+            date_str = date.strftime("%Y-%m-%d")
+            day_name = date.strftime("%A")
+            print(f"\n📆 {day_name}, {date_str}")
+            print("-" * 40)
             
-            # Check for existing entry
-            project_dates = existing.get(project_id, set())
-            if date_str in project_dates:
-                print(f"  ⏭️  {project_name}: already has entry, skipping")
-                entries_skipped += 1
+            # Projects that still need an entry on this day
+            missing = project_ids - {
+                project_id for project_id, project_dates in existing.items()
+                if date_str in project_dates
+            }
+            if schedule and not missing:
+                print("  ⏭️  All projects already have entries, skipping")
+                entries_skipped += len(schedule)
                 continue
             
-            # Generate description
-            if args.analyze_history and history_entries:
-                generator = DescriptionGenerator.from_history(history_entries, project_id)
-                if slot["templates"]:
-                    generator.add_templates(slot["templates"])
-            else:
-                generator = DescriptionGenerator(templates=slot["templates"])
-            
-            description = generator.generate()
+            slots = calculate_time_slots(date, schedule, start_hour)
+            pending = []
             
-            time_range = f"{slot['start'].strftime('%H:%M')} - {slot['end'].strftime('%H:%M')}"
-            
-            if args.dry_run:
-                print(f"  📝 {project_name} ({time_range})")
-                print(f"      \"{description}\"")
-            else:
-                try:
-                    client.create_time_entry(
-                        start=slot["start"],
-                        end=slot["end"],
+            for position, slot in enumerate(slots):
+                project_id = slot["project_id"]
+                project_name = slot["project_name"]
+                
+                # Check for existing entry
+                if project_id not in missing:
+                    print(f"  ⏭️  {project_name}: already has entry, skipping")
+                    entries_skipped += 1
+                    continue
+                
+                description = generators[position].generate()
+                
+                time_range = f"{slot['start'].strftime('%H:%M')} - {slot['end'].strftime('%H:%M')}"
+                
+                if args.dry_run:
+                    print(f"  📝 {project_name} ({time_range})")
+                    print(f"      \"{description}\"")
+                else:
+                    # Fire the request now, report results in slot order below
+                    future = executor.submit(
+                        client.create_time_entry,
+                        start=slot["start_iso"],
+                        end=slot["end_iso"],
                         project_id=project_id,
                         description=description
                     )
+                    pending.append((project_name, time_range, description, future))
+            
+            for project_name, time_range, description, future in pending:
+                try:
+                    future.result()
                     print(f"  ✅ {project_name} ({time_range})")
                     print(f"      \"{description}\"")
                     entries_created += 1